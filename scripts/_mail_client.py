@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+测试脚本共用的 SMTP 发送客户端
+
+把各个测试脚本里重复的「构造 MIME、连接 SMTP、sendmail、QUIT」套路收拢
+到一个地方：TestMailer 作为上下文管理器持有一条支持 PIPELINING 的连接
+（见 _pipelined_smtp），build_message_bytes 只做一次 MIME 编码并保留
+占位符可替换的 8bit 正文，batch/batch_bytes 用线程池并发发送、每个
+工作线程持有自己的连接。
+"""
+
+import smtplib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from email.charset import Charset
+from email.header import Header
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from _pipelined_smtp import PipelinedSMTP
+
+DEFAULT_HOST = "localhost"
+DEFAULT_PORT = 2525
+
+# 单条连接最多复用的发送次数，超过后重新连接
+MAX_SENDS_PER_CONNECTION = 10000
+
+
+def encoded_subject_template(prefix, suffix=""):
+    """主题模板：非 ASCII 前缀先用 Header 编码，ASCII 后缀保持原样
+
+    后缀里的占位符（如 " #__SEQ__"）因此在编码后的字节里仍然可替换。
+    """
+    return f"{Header(prefix, 'utf-8').encode()}{suffix}"
+
+
+def build_message_bytes(from_, to, subject, body, html=None):
+    """构造一封邮件并一次性编码为字节
+
+    正文使用 8bit 传输编码、主题的非 ASCII 部分预先编码，调用方可以在
+    返回的字节上继续做占位符替换（例如 __SEQ__）再交给 sendmail。
+    """
+    charset = Charset("utf-8")
+    charset.body_encoding = None
+
+    def text_part(content, subtype):
+        part = MIMEText("", subtype)
+        part.set_payload(content, charset=charset)
+        del part["Content-Transfer-Encoding"]
+        part["Content-Transfer-Encoding"] = "8bit"
+        return part
+
+    if html is None:
+        msg = text_part(body, "plain")
+    else:
+        msg = MIMEMultipart("alternative")
+        msg.attach(text_part(body, "plain"))
+        msg.attach(text_part(html, "html"))
+
+    msg["From"] = from_
+    msg["To"] = to
+    msg["Subject"] = subject if subject.isascii() else encoded_subject_template(subject)
+    return msg.as_bytes()
+
+
+class TestMailer:
+    """持有一条可复用 SMTP 连接的测试邮件发送器"""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.host = host
+        self.port = port
+        self._server = None
+        self._sent = 0
+
+    def connect(self):
+        if self._server is None:
+            self._server = PipelinedSMTP(self.host, self.port)
+            self._sent = 0
+        return self._server
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except smtplib.SMTPException:
+                pass
+            self._server = None
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def send_bytes(self, from_, to, payload):
+        """发送已编码好的邮件字节（占位符替换后的载荷）"""
+        if self._sent >= MAX_SENDS_PER_CONNECTION:
+            self.close()
+        server = self.connect()
+        server.sendmail(from_, to, payload)
+        self._sent += 1
+
+    def send(self, from_, to, subject, body, html=None):
+        """构造并发送一封邮件"""
+        self.send_bytes(from_, to, build_message_bytes(from_, to, subject, body, html))
+
+    @classmethod
+    def _batch(cls, items, send_with, host, port, workers):
+        thread_local = threading.local()
+        mailers = []
+
+        def send_one(item):
+            mailer = getattr(thread_local, "mailer", None)
+            if mailer is None:
+                mailer = cls(host, port)
+                thread_local.mailer = mailer
+                mailers.append(mailer)
+            send_with(mailer, item)
+            return True
+
+        results = []
+        try:
+            max_workers = max(1, min(len(items), workers))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(send_one, item) for item in items]
+                for future in futures:
+                    try:
+                        results.append(future.result())
+                    except Exception as e:
+                        results.append(e)
+        finally:
+            for mailer in mailers:
+                mailer.close()
+        return results
+
+    @classmethod
+    def batch(cls, messages, host=DEFAULT_HOST, port=DEFAULT_PORT, workers=8):
+        """并发发送 (from_, to, subject, body[, html]) 列表
+
+        返回与输入同序的结果列表：成功为 True，失败为对应的异常对象。
+        """
+        return cls._batch(
+            messages, lambda mailer, m: mailer.send(*m), host, port, workers
+        )
+
+    @classmethod
+    def batch_bytes(cls, payloads, host=DEFAULT_HOST, port=DEFAULT_PORT, workers=8):
+        """并发发送 (from_, to, payload) 已编码载荷列表，返回同 batch"""
+        return cls._batch(
+            payloads, lambda mailer, p: mailer.send_bytes(*p), host, port, workers
+        )
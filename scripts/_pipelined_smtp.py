@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+支持 SMTP PIPELINING (RFC 2920) 的 smtplib.SMTP 子类
+
+标准库的 sendmail 按「命令-响应」逐条发送 MAIL FROM / RCPT TO / DATA，
+每条命令都要等一个完整往返。当服务器在 EHLO 中声明 PIPELINING 能力时，
+这里把这几条信封命令合并成一次写入、再按序统一读取响应，把每封邮件的
+往返次数从 3+ 次降到 1 次。服务器不支持 PIPELINING 时自动退回标准行为。
+"""
+
+import re
+import smtplib
+import socket
+
+_CRLF = b"\r\n"
+
+# 发送缓冲区调大到 256KB，让流水线化的信封命令和正文一次性进入内核
+_SNDBUF_SIZE = 262144
+
+
+def _fix_eols(data):
+    """把裸 \\n / \\r 统一成 SMTP 要求的 \\r\\n"""
+    return re.sub(rb"(?:\r\n|\n|\r(?!\n))", _CRLF, data)
+
+
+class PipelinedSMTP(smtplib.SMTP):
+    """sendmail 时批量发送信封命令的 SMTP 客户端"""
+
+    def _get_socket(self, host, port, timeout):
+        # 关闭 Nagle：逐行写命令时 Nagle + 延迟 ACK 会在每封邮件上
+        # 叠加约 40ms 的停顿；批量写入本身已经把小包合并好了
+        sock = super()._get_socket(host, port, timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, _SNDBUF_SIZE)
+        return sock
+
+    def sendmail(self, from_addr, to_addrs, msg, mail_options=(), rcpt_options=()):
+        self.ehlo_or_helo_if_needed()
+
+        # 不支持 PIPELINING（或带了扩展选项）时走标准实现
+        if "pipelining" not in self.esmtp_features or mail_options or rcpt_options:
+            return super().sendmail(
+                from_addr, to_addrs, msg, mail_options, rcpt_options
+            )
+
+        if isinstance(msg, str):
+            msg = msg.encode("ascii")
+        msg = _fix_eols(msg)
+        if isinstance(to_addrs, str):
+            to_addrs = [to_addrs]
+
+        # 一次写入所有信封命令
+        commands = [b"MAIL FROM:<" + from_addr.encode("ascii") + b">"]
+        commands += [b"RCPT TO:<" + addr.encode("ascii") + b">" for addr in to_addrs]
+        commands.append(b"DATA")
+        self.send(_CRLF.join(commands) + _CRLF)
+
+        # 按发送顺序读取全部响应（PIPELINING 服务器保证逐条应答）
+        mail_code, mail_resp = self.getreply()
+        senderrs = {}
+        for addr in to_addrs:
+            code, resp = self.getreply()
+            if code not in (250, 251):
+                senderrs[addr] = (code, resp)
+        data_code, data_resp = self.getreply()
+
+        if mail_code != 250:
+            if mail_code == 421:
+                self.close()
+            raise smtplib.SMTPSenderRefused(mail_code, mail_resp, from_addr)
+
+        if len(senderrs) == len(to_addrs) or data_code != 354:
+            if data_code == 354:
+                # 服务器已接受 DATA，发送空消息终止后再报错
+                self.send(b"." + _CRLF)
+                self.getreply()
+            if len(senderrs) == len(to_addrs):
+                raise smtplib.SMTPRecipientsRefused(senderrs)
+            raise smtplib.SMTPDataError(data_code, data_resp)
+
+        # 发送正文（行首的 . 转义为 ..），以单独一行的 . 结束
+        quoted = re.sub(rb"(?m)^\.", b"..", msg)
+        if not quoted.endswith(_CRLF):
+            quoted += _CRLF
+        self.send(quoted + b"." + _CRLF)
+
+        code, resp = self.getreply()
+        if code != 250:
+            if code == 421:
+                self.close()
+            raise smtplib.SMTPDataError(code, resp)
+
+        return senderrs
@@ -4,55 +4,21 @@
 用于向本地临时邮箱发送测试邮件
 """
 
-import smtplib
 import sys
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.base import MIMEBase
-from email import encoders
+from pathlib import Path
 import argparse
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
-def send_test_email(to_address, subject="测试邮件", content="这是一封测试邮件"):
-    """发送测试邮件到指定地址"""
+from _mail_client import TestMailer, build_message_bytes, encoded_subject_template
 
-    # SMTP 服务器配置（使用后端邮件接收服务）
-    smtp_server = "localhost"
-    smtp_port = 25
 
-    # 创建邮件
-    msg = MIMEMultipart()
-    msg["From"] = "test@example.com"
-    msg["To"] = to_address
-    msg["Subject"] = subject
+# SMTP 服务器配置（使用后端邮件接收服务）
+SMTP_SERVER = "localhost"
+SMTP_PORT = 25
+HTML_SMTP_PORT = 2525
 
-    # 添加邮件正文
-    msg.attach(MIMEText(content, "plain", "utf-8"))
-
-    try:
-        # 连接到 SMTP 服务器
-        server = smtplib.SMTP(smtp_server, smtp_port)
-
-        # 发送邮件
-        text = msg.as_string()
-        server.sendmail("test@example.com", to_address, text)
-        server.quit()
-
-        print(f"✅ 测试邮件已发送到: {to_address}")
-        print(f"📧 主题: {subject}")
-        print(f"🌐 可以在 http://localhost:8025 查看邮件")
-
-    except Exception as e:
-        print(f"❌ 发送邮件失败: {e}")
-        return False
-
-    return True
-
-
-def send_html_email(to_address):
-    """发送包含 HTML 内容的测试邮件"""
-
-    html_content = """
+HTML_CONTENT = """
     <html>
       <body>
         <h2>🎉 HTML 测试邮件</h2>
@@ -67,25 +33,56 @@ def send_html_email(to_address):
     </html>
     """
 
-    smtp_server = "localhost"
-    smtp_port = 2525
 
-    msg = MIMEMultipart("alternative")
-    msg["From"] = "html-test@example.com"
-    msg["To"] = to_address
-    msg["Subject"] = "HTML 格式测试邮件"
+def send_test_email(to_address, subject="测试邮件", content="这是一封测试邮件", mailer=None):
+    """发送测试邮件到指定地址
 
-    # 添加纯文本版本
-    text_part = MIMEText("这是纯文本版本的测试邮件", "plain", "utf-8")
-    html_part = MIMEText(html_content, "html", "utf-8")
+    传入已连接的 mailer 时复用该 SMTP 连接（由调用方负责关闭），
+    否则临时建立连接并关闭。
+    """
 
-    msg.attach(text_part)
-    msg.attach(html_part)
+    try:
+        if mailer is not None:
+            mailer.send("test@example.com", to_address, subject, content)
+        else:
+            with TestMailer(SMTP_SERVER, SMTP_PORT) as one_shot:
+                one_shot.send("test@example.com", to_address, subject, content)
+
+        print(f"✅ 测试邮件已发送到: {to_address}")
+        print(f"📧 主题: {subject}")
+        print(f"🌐 可以在 http://localhost:8025 查看邮件")
+
+    except Exception as e:
+        print(f"❌ 发送邮件失败: {e}")
+        return False
+
+    return True
+
+
+def send_html_email(to_address, mailer=None):
+    """发送包含 HTML 内容的测试邮件
+
+    与 send_test_email 一样支持复用传入的 mailer。
+    """
 
     try:
-        server = smtplib.SMTP(smtp_server, smtp_port)
-        server.sendmail("html-test@example.com", to_address, msg.as_string())
-        server.quit()
+        if mailer is not None:
+            mailer.send(
+                "html-test@example.com",
+                to_address,
+                "HTML 格式测试邮件",
+                "这是纯文本版本的测试邮件",
+                html=HTML_CONTENT,
+            )
+        else:
+            with TestMailer(SMTP_SERVER, HTML_SMTP_PORT) as one_shot:
+                one_shot.send(
+                    "html-test@example.com",
+                    to_address,
+                    "HTML 格式测试邮件",
+                    "这是纯文本版本的测试邮件",
+                    html=HTML_CONTENT,
+                )
 
         print(f"✅ HTML 测试邮件已发送到: {to_address}")
 
@@ -113,22 +110,46 @@ def main():
     print(f"📊 发送数量: {args.multiple}")
     print("-" * 50)
 
-    success_count = 0
-
-    for i in range(args.multiple):
-        if args.html:
-            success = send_html_email(args.email)
+    # 整封邮件只编码一次：HTML 内容每封相同、直接复用同一份载荷，
+    # 纯文本模板用 __SEQ__ 占位符按封替换序号
+    smtp_port = HTML_SMTP_PORT if args.html else SMTP_PORT
+
+    if args.html:
+        from_addr = "html-test@example.com"
+        template = build_message_bytes(
+            from_addr,
+            args.email,
+            "HTML 格式测试邮件",
+            "这是纯文本版本的测试邮件",
+            html=HTML_CONTENT,
+        )
+    else:
+        from_addr = "test@example.com"
+        if args.multiple > 1:
+            subject_value = encoded_subject_template(args.subject, " #__SEQ__")
+            body_value = f"{args.content}\n\n邮件编号: __SEQ__/{args.multiple}"
         else:
-            subject = f"{args.subject} #{i+1}" if args.multiple > 1 else args.subject
-            content = (
-                f"{args.content}\n\n邮件编号: {i+1}/{args.multiple}"
-                if args.multiple > 1
-                else args.content
-            )
-            success = send_test_email(args.email, subject, content)
+            subject_value = encoded_subject_template(args.subject)
+            body_value = args.content
+        template = build_message_bytes(from_addr, args.email, subject_value, body_value)
+
+    payloads = [
+        (from_addr, args.email, template.replace(b"__SEQ__", str(i + 1).encode()))
+        for i in range(args.multiple)
+    ]
+
+    # 并发发送：每个工作线程持有自己的 SMTP 连接，发送之间互不等待
+    results = TestMailer.batch_bytes(
+        payloads, SMTP_SERVER, smtp_port, workers=min(args.multiple, 16)
+    )
 
-        if success:
+    success_count = 0
+    for result in results:
+        if isinstance(result, Exception):
+            print(f"❌ 发送邮件失败: {result}")
+        else:
             success_count += 1
+            print(f"✅ 测试邮件已发送到: {args.email}")
 
     print("-" * 50)
     print(f"📈 发送完成: {success_count}/{args.multiple} 封邮件发送成功")
@@ -4,9 +4,13 @@
 使用手动创建的邮箱地址测试WebSocket推送
 """
 
-import smtplib
+import sys
 import time
-from email.mime.text import MIMEText
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from _mail_client import TestMailer, build_message_bytes, encoded_subject_template
 
 
 def main():
@@ -39,39 +43,42 @@ def main():
     # 发送测试邮件
     print("📤 发送测试邮件...")
 
-    for i in range(3):
-        subject = f"手动WebSocket测试邮件 #{i+1}"
-        content = f"""
-这是第 {i+1} 封手动WebSocket测试邮件。
+    # 整封邮件只做一次 MIME 编码，循环内只替换 __SEQ__ / __TS__ 占位符
+    template = build_message_bytes(
+        "manual-test-__SEQ__@example.com",
+        test_address,
+        encoded_subject_template("手动WebSocket测试邮件", " #__SEQ__"),
+        f"""
+这是第 __SEQ__ 封手动WebSocket测试邮件。
 
-发送时间: {time.strftime('%Y-%m-%d %H:%M:%S')}
+发送时间: __TS__
 收件地址: {test_address}
-邮件编号: {i+1}/3
+邮件编号: __SEQ__/3
 
 这个测试用于验证邮件接收服务是否能正确处理邮件。
-        """.strip()
-
-        msg = MIMEText(content, "plain", "utf-8")
-        msg["From"] = f"manual-test-{i+1}@example.com"
-        msg["To"] = test_address
-        msg["Subject"] = subject
-
-        try:
-            server = smtplib.SMTP("localhost", 2525)
-            server.sendmail(
-                f"manual-test-{i+1}@example.com", test_address, msg.as_string()
-            )
-            server.quit()
-
-            print(f"✅ 邮件 {i+1} 已发送: {subject}")
-
-            # 间隔发送
-            if i < 2:
-                print("   等待 2 秒...")
-                time.sleep(2)
-
-        except Exception as e:
-            print(f"❌ 邮件 {i+1} 发送失败: {e}")
+    """.strip(),
+    )
+
+    # 发送时间只取一次：三封邮件并发发出，逐封调用 strftime 没有意义
+    ts = time.strftime("%Y-%m-%d %H:%M:%S").encode()
+
+    payloads = [
+        (
+            f"manual-test-{i+1}@example.com",
+            test_address,
+            template.replace(b"__SEQ__", str(i + 1).encode()).replace(b"__TS__", ts),
+        )
+        for i in range(3)
+    ]
+
+    # 并发发送三封邮件：每个工作线程持有自己的 SMTP 连接（线程局部复用），
+    # MailHog 在本地、没有限速，不需要发送间隔
+    results = TestMailer.batch_bytes(payloads, "localhost", 2525, workers=3)
+    for i, result in enumerate(results):
+        if isinstance(result, Exception):
+            print(f"❌ 邮件 {i+1} 发送失败: {result}")
+        else:
+            print(f"✅ 邮件 {i+1} 已发送: 手动WebSocket测试邮件 #{i+1}")
 
     print("-" * 60)
 
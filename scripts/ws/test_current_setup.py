@@ -3,57 +3,35 @@
 测试当前设置的脚本
 """
 
-import smtplib
+import sys
 import requests
 import time
-from email.mime.text import MIMEText
+from pathlib import Path
+from requests.adapters import HTTPAdapter
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
-def test_with_127_domain():
-    """使用127.0.0.1域名测试"""
-    print("🧪 测试使用 127.0.0.1 域名...")
+from _mail_client import TestMailer
 
-    # 手动创建一个测试邮箱地址
-    test_address = f"test{int(time.time())}@127.0.0.1"
-    print(f"📧 测试地址: {test_address}")
-
-    # 发送邮件
-    try:
-        msg = MIMEText("这是一封测试邮件", "plain", "utf-8")
-        msg["From"] = "test@example.com"
-        msg["To"] = test_address
-        msg["Subject"] = "域名测试邮件"
+# 所有 HTTP 检查共用一个 Session，复用 keep-alive 连接而不是每次重新握手
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
 
-        server = smtplib.SMTP("localhost", 2525)
-        server.sendmail("test@example.com", test_address, msg.as_string())
-        server.quit()
 
-        print("✅ 邮件发送成功")
-        return True
-
-    except Exception as e:
-        print(f"❌ 邮件发送失败: {e}")
-        return False
-
-
-def test_with_nnu_domain():
-    """使用nnu.edu.kg域名测试"""
-    print("🧪 测试使用 nnu.edu.kg 域名...")
+def test_with_domain(domain):
+    """使用指定域名测试"""
+    print(f"🧪 测试使用 {domain} 域名...")
 
     # 手动创建一个测试邮箱地址
-    test_address = f"test{int(time.time())}@nnu.edu.kg"
+    test_address = f"test{int(time.time())}@{domain}"
     print(f"📧 测试地址: {test_address}")
 
     # 发送邮件
     try:
-        msg = MIMEText("这是一封测试邮件", "plain", "utf-8")
-        msg["From"] = "test@example.com"
-        msg["To"] = test_address
-        msg["Subject"] = "域名测试邮件"
-
-        server = smtplib.SMTP("localhost", 2525)
-        server.sendmail("test@example.com", test_address, msg.as_string())
-        server.quit()
+        with TestMailer("localhost", 2525) as mailer:
+            mailer.send(
+                "test@example.com", test_address, "域名测试邮件", "这是一封测试邮件"
+            )
 
         print("✅ 邮件发送成功")
         return True
@@ -69,14 +47,14 @@ def check_backend_status():
 
     try:
         # 检查健康状态
-        response = requests.get("http://localhost:3001/health")
+        response = SESSION.get("http://localhost:3001/health")
         if response.status_code == 200:
             print("✅ 后端服务正常")
         else:
             print(f"❌ 后端服务异常: {response.status_code}")
 
         # 检查邮件服务
-        response = requests.get("http://localhost:3001/health/mail")
+        response = SESSION.get("http://localhost:3001/health/mail")
         if response.status_code == 200:
             data = response.json()
             mail_service = data.get("mailService", {})
@@ -99,10 +77,10 @@ def main():
     print("-" * 50)
 
     # 测试两种域名
-    success_127 = test_with_127_domain()
+    success_127 = test_with_domain("127.0.0.1")
     print("-" * 50)
 
-    success_nnu = test_with_nnu_domain()
+    success_nnu = test_with_domain("nnu.edu.kg")
     print("-" * 50)
 
     # 总结
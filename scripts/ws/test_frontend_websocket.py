@@ -1,141 +1,250 @@
 #!/usr/bin/env python3
 """
 完整的WebSocket推送测试脚本
+
+基于 asyncio：HTTP 用 aiohttp（复用一个 ClientSession），SMTP 用
+aiosmtplib，三封测试邮件在同一个连接上并发发送
 """
 
-import smtplib
-import requests
-import time
+import asyncio
 import json
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import sys
+import time
+from pathlib import Path
 
+import aiohttp
+import aiosmtplib
 
-def main():
-    print("🚀 完整的WebSocket推送测试")
-    print("=" * 60)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
-    # 1. 创建邮箱
-    print("📧 创建测试邮箱...")
-    try:
-        response = requests.post("http://localhost:3001/api/mailbox/generate")
-        if response.status_code in [200, 201]:
-            result = response.json()
-            if result.get("success") and "data" in result:
-                data = result["data"]
-                mailbox_address = data["address"]
-                mailbox_id = data["id"]
-                token = data["token"]
-
-                print(f"✅ 邮箱创建成功:")
-                print(f"   地址: {mailbox_address}")
-                print(f"   ID: {mailbox_id}")
-                print(f"   Token: {token[:20]}...")
+from _mail_client import build_message_bytes, encoded_subject_template
 
-            else:
+API_BASE = "http://localhost:3001"
+
+# 轮询集成服务计数的退避参数：50ms 起步、每次翻倍、封顶 1 秒，总预算 10 秒
+POLL_INITIAL_DELAY = 0.05
+POLL_MAX_DELAY = 1.0
+POLL_BUDGET = 10.0
+
+
+async def create_mailbox(session):
+    """创建测试邮箱，返回 (地址, ID, token) 或 None"""
+    try:
+        async with session.post(f"{API_BASE}/api/mailbox/generate") as response:
+            if response.status in [200, 201]:
+                result = await response.json()
+                if result.get("success") and "data" in result:
+                    data = result["data"]
+                    return data["address"], data["id"], data["token"]
                 print("❌ 邮箱创建失败")
-                return
-        else:
-            print(f"❌ 邮箱创建失败: {response.status_code}")
-            return
+                return None
+            print(f"❌ 邮箱创建失败: {response.status}")
+            return None
     except Exception as e:
         print(f"❌ 邮箱创建异常: {e}")
-        return
+        return None
+
 
-    print("-" * 60)
+async def send_test_emails(mailbox_address):
+    """在同一个 SMTP 连接上发送三封测试邮件
 
-    # 2. 显示测试说明
-    print("📋 测试步骤:")
-    print("1. 在浏览器中打开以下地址:")
-    print(f"   http://localhost:3000/mailbox/{mailbox_id}")
-    print()
-    print("2. 或者使用WebSocket测试页面:")
-    print("   打开 scripts/test_frontend_websocket.html")
-    print(f"   输入邮箱ID: {mailbox_id}")
-    print(f"   输入令牌: {token}")
-    print()
-    print("3. 然后按回车键，脚本将发送测试邮件...")
+    服务器支持 PIPELINING 时用 asyncio.gather 并发提交，
+    否则逐封顺序发送。
+    """
+    # 整封邮件只做一次 MIME 编码，每封邮件只替换 __SEQ__ / __TS__ 占位符
+    template = build_message_bytes(
+        "test-__SEQ__@example.com",
+        mailbox_address,
+        encoded_subject_template("实时推送测试邮件", " #__SEQ__"),
+        f"""
+这是第 __SEQ__ 封实时推送测试邮件。
 
-    input("按回车键继续...")
+发送时间: __TS__
+收件地址: {mailbox_address}
+邮件编号: __SEQ__/3
 
-    print("-" * 60)
+如果WebSocket连接正常，您应该能在前端界面实时看到这封邮件。
+    """.strip(),
+    )
 
-    # 3. 发送测试邮件
-    print("📤 发送测试邮件...")
+    # 发送时间只取一次：三封邮件并发发出，逐封调用 strftime 没有意义
+    ts = time.strftime("%Y-%m-%d %H:%M:%S").encode()
 
+    messages = []
     for i in range(3):
         subject = f"实时推送测试邮件 #{i+1}"
-        content = f"""
-这是第 {i+1} 封实时推送测试邮件。
+        payload = template.replace(b"__SEQ__", str(i + 1).encode()).replace(
+            b"__TS__", ts
+        )
+        messages.append((subject, f"test-{i+1}@example.com", payload))
 
-发送时间: {time.strftime('%Y-%m-%d %H:%M:%S')}
-收件地址: {mailbox_address}
-邮件编号: {i+1}/3
+    try:
+        smtp = aiosmtplib.SMTP(hostname="localhost", port=2525)
+        await smtp.connect()
+    except Exception as e:
+        print(f"❌ SMTP 连接失败: {e}")
+        return
 
-如果WebSocket连接正常，您应该能在前端界面实时看到这封邮件。
-        """.strip()
+    try:
+        await smtp.ehlo()
+        if smtp.supports_extension("pipelining"):
+            results = await asyncio.gather(
+                *(
+                    smtp.sendmail(sender, [mailbox_address], payload)
+                    for _, sender, payload in messages
+                ),
+                return_exceptions=True,
+            )
+        else:
+            results = []
+            for _, sender, payload in messages:
+                try:
+                    results.append(
+                        await smtp.sendmail(sender, [mailbox_address], payload)
+                    )
+                except Exception as e:
+                    results.append(e)
+
+        for i, ((subject, _, _), result) in enumerate(zip(messages, results)):
+            if isinstance(result, Exception):
+                print(f"❌ 邮件 {i+1} 发送失败: {result}")
+            else:
+                print(f"✅ 邮件 {i+1} 已发送: {subject}")
+    finally:
+        try:
+            await smtp.quit()
+        except aiosmtplib.SMTPException:
+            pass
 
-        msg = MIMEMultipart()
-        msg["From"] = f"test-{i+1}@example.com"
-        msg["To"] = mailbox_address
-        msg["Subject"] = subject
-        msg.attach(MIMEText(content, "plain", "utf-8"))
 
-        try:
-            server = smtplib.SMTP("localhost", 2525)
-            server.sendmail(f"test-{i+1}@example.com", mailbox_address, msg.as_string())
-            server.quit()
-            print(f"✅ 邮件 {i+1} 已发送: {subject}")
+async def get_total_mails(session):
+    """读取集成服务已处理的邮件计数，失败时返回 None"""
+    try:
+        async with session.get(f"{API_BASE}/health/integration") as response:
+            if response.status != 200:
+                return None
+            data = await response.json()
+            return data.get("integration", {}).get("totalMails")
+    except Exception:
+        return None
+
+
+async def wait_for_mail_count(session, baseline, expected):
+    """指数退避轮询集成服务，直到处理计数比 baseline 至少多 expected 封
+
+    代替固定等待：邮件一被后端处理就立即继续，最多等 POLL_BUDGET 秒。
+    """
+    if baseline is None:
+        return
+
+    delay = POLL_INITIAL_DELAY
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + POLL_BUDGET
 
-            # 间隔发送
-            if i < 2:
-                print("   等待 3 秒...")
-                time.sleep(3)
+    while True:
+        total = await get_total_mails(session)
+        if total is not None and total - baseline >= expected:
+            return
+
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return
 
-        except Exception as e:
-            print(f"❌ 邮件 {i+1} 发送失败: {e}")
+        await asyncio.sleep(min(delay, remaining))
+        delay = min(delay * 2, POLL_MAX_DELAY)
 
-    print("-" * 60)
 
-    # 4. 检查后端状态
-    print("🔍 检查后端集成服务状态...")
+async def check_integration_status(session):
+    """检查后端集成服务状态"""
     try:
-        response = requests.get("http://localhost:3001/health/integration")
-        if response.status_code == 200:
-            integration_status = response.json()
-            integration_info = integration_status.get("integration", {})
-            print(f"✅ 集成服务状态:")
-            print(
-                f"   健康状态: {'✅ 健康' if integration_info.get('isHealthy') else '❌ 异常'}"
-            )
-            print(f"   处理邮件数: {integration_info.get('totalMails', 0)}")
-            print(f"   成功推送数: {integration_info.get('successfulBroadcasts', 0)}")
-            print(f"   失败推送数: {integration_info.get('failedBroadcasts', 0)}")
-            print(f"   成功率: {integration_info.get('successRate', '0%')}")
-        else:
-            print(f"❌ 集成服务检查失败: {response.status_code}")
+        async with session.get(f"{API_BASE}/health/integration") as response:
+            if response.status == 200:
+                integration_status = await response.json()
+                integration_info = integration_status.get("integration", {})
+                print(f"✅ 集成服务状态:")
+                print(
+                    f"   健康状态: {'✅ 健康' if integration_info.get('isHealthy') else '❌ 异常'}"
+                )
+                print(f"   处理邮件数: {integration_info.get('totalMails', 0)}")
+                print(
+                    f"   成功推送数: {integration_info.get('successfulBroadcasts', 0)}"
+                )
+                print(f"   失败推送数: {integration_info.get('failedBroadcasts', 0)}")
+                print(f"   成功率: {integration_info.get('successRate', '0%')}")
+            else:
+                print(f"❌ 集成服务检查失败: {response.status}")
     except Exception as e:
         print(f"❌ 集成服务检查异常: {e}")
 
-    print("-" * 60)
-
-    # 5. 最终说明
-    print("📊 测试完成!")
-    print()
-    print("🔍 如何验证WebSocket推送是否正常:")
-    print("1. 在前端页面中，您应该能看到3封新邮件")
-    print("2. 邮件应该实时出现，无需手动刷新")
-    print("3. 如果需要手动刷新才能看到邮件，说明WebSocket推送有问题")
-    print()
-    print("🔧 如果WebSocket推送不工作，请检查:")
-    print("1. 浏览器开发者工具的Console和Network标签")
-    print("2. 确认WebSocket连接状态")
-    print("3. 检查前端是否正确订阅了邮箱")
-    print("4. 查看后端日志中的WebSocket相关信息")
-    print()
-    print(f"🌐 前端地址: http://localhost:3000/mailbox/{mailbox_id}")
-    print(f"🔧 WebSocket测试页面: scripts/test_frontend_websocket.html")
+
+async def main():
+    print("🚀 完整的WebSocket推送测试")
+    print("=" * 60)
+
+    async with aiohttp.ClientSession() as session:
+        # 1. 创建邮箱
+        print("📧 创建测试邮箱...")
+        mailbox = await create_mailbox(session)
+        if not mailbox:
+            return
+        mailbox_address, mailbox_id, token = mailbox
+
+        print(f"✅ 邮箱创建成功:")
+        print(f"   地址: {mailbox_address}")
+        print(f"   ID: {mailbox_id}")
+        print(f"   Token: {token[:20]}...")
+
+        print("-" * 60)
+
+        # 2. 显示测试说明
+        print("📋 测试步骤:")
+        print("1. 在浏览器中打开以下地址:")
+        print(f"   http://localhost:3000/mailbox/{mailbox_id}")
+        print()
+        print("2. 或者使用WebSocket测试页面:")
+        print("   打开 scripts/test_frontend_websocket.html")
+        print(f"   输入邮箱ID: {mailbox_id}")
+        print(f"   输入令牌: {token}")
+        print()
+        print("3. 然后按回车键，脚本将发送测试邮件...")
+
+        input("按回车键继续...")
+
+        print("-" * 60)
+
+        # 3. 发送测试邮件
+        print("📤 发送测试邮件...")
+        baseline = await get_total_mails(session)
+        await send_test_emails(mailbox_address)
+
+        print("-" * 60)
+
+        # 4. 等后端处理完三封邮件再检查状态（计数一到立即继续）
+        print("⏳ 等待后端处理邮件...")
+        await wait_for_mail_count(session, baseline, 3)
+
+        print("🔍 检查后端集成服务状态...")
+        await check_integration_status(session)
+
+        print("-" * 60)
+
+        # 5. 最终说明
+        print("📊 测试完成!")
+        print()
+        print("🔍 如何验证WebSocket推送是否正常:")
+        print("1. 在前端页面中，您应该能看到3封新邮件")
+        print("2. 邮件应该实时出现，无需手动刷新")
+        print("3. 如果需要手动刷新才能看到邮件，说明WebSocket推送有问题")
+        print()
+        print("🔧 如果WebSocket推送不工作，请检查:")
+        print("1. 浏览器开发者工具的Console和Network标签")
+        print("2. 确认WebSocket连接状态")
+        print("3. 检查前端是否正确订阅了邮箱")
+        print("4. 查看后端日志中的WebSocket相关信息")
+        print()
+        print(f"🌐 前端地址: http://localhost:3000/mailbox/{mailbox_id}")
+        print(f"🔧 WebSocket测试页面: scripts/test_frontend_websocket.html")
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
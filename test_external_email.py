@@ -1,64 +1,303 @@
 #!/usr/bin/env python3
+import asyncio
+import atexit
+import functools
+import queue
 import smtplib
 import socket
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from email import policy
+from email.message import EmailMessage
 import sys
+from pathlib import Path
 
-def send_external_email():
-    """
-    This simulates sending an email from an external service (like Gmail)
-    by sending it directly to MailHog, which will capture it for testing.
-    """
-    # MailHog SMTP configuration (simulating external email)
-    smtp_server = "127.0.0.1"
-    smtp_port = 1025  # MailHog SMTP port
-    
-    # Simulate external email details
-    sender_email = "external.user@gmail.com"
-    recipient_email = "6d40f1571izg@nnu.edu.kg"
-    subject = "🌐 External Email Test - Simulating Gmail"
-    body = """
+sys.path.insert(0, str(Path(__file__).resolve().parent / "scripts"))
+
+import aiosmtplib
+
+from _pipelined_smtp import PipelinedSMTP
+
+# MailHog SMTP configuration (simulating external email)
+SMTP_SERVER = "127.0.0.1"
+SMTP_PORT = 1025  # MailHog SMTP port
+
+# Simulated external email details
+SENDER_EMAIL = "external.user@gmail.com"
+RECIPIENT_EMAIL = "6d40f1571izg@nnu.edu.kg"
+SUBJECT = "🌐 External Email Test - Simulating Gmail"
+BODY = """
     Hello from the outside world! 🌍
-    
-    This email simulates what would happen if someone sent an email 
+
+    This email simulates what would happen if someone sent an email
     from Gmail, Yahoo, or another external provider to your temporary mailbox.
-    
-    In a real-world scenario with proper DNS configuration, this is how 
+
+    In a real-world scenario with proper DNS configuration, this is how
     external emails would be delivered to your mail service.
-    
+
     Best regards,
     External Email System
     """
-    
-    # Create message
-    message = MIMEMultipart()
-    message["From"] = sender_email
-    message["To"] = recipient_email
-    message["Subject"] = subject
-    
-    # Add body to email
-    message.attach(MIMEText(body, "plain"))
-    
+
+# Connection pool sizing: up to 5 live sessions, each recycled after 100
+# sends so long batch runs don't sit on one aging connection
+POOL_SIZE = 5
+MAX_SENDS_PER_CONNECTION = 100
+
+# Skip the EHLO round-trip for the local MailHog endpoint, whose
+# capabilities are fixed and known; set False to probe the server again
+MAILHOG_FASTPATH = True
+
+# Bound every socket operation so a connect stall shows up as a timeout
+# error instead of silently dragging the suite out
+SMTP_TIMEOUT = 5
+
+def _build_message():
+    """Build the simulated external email.
+
+    EmailMessage with the SMTP policy flattens straight to CRLF-framed
+    bytes and keeps the plain-text body single-part — no multipart
+    boundary overhead on the wire and no legacy Generator string pass.
+    """
+    message = EmailMessage(policy=policy.SMTP)
+    message["From"] = SENDER_EMAIL
+    message["To"] = RECIPIENT_EMAIL
+    message["Subject"] = SUBJECT
+    message.set_content(BODY)
+    return message
+
+@functools.lru_cache(maxsize=1)
+def _message_bytes():
+    """Flatten the static test message once, on first use.
+
+    The SMTP policy already emits CRLF-framed bytes, so the cached
+    payload goes to sendmail untouched; deferring the flatten keeps
+    importing this module free of MIME work.
+    """
+    return _build_message().as_bytes()
+
+class FastMailHogSMTP(PipelinedSMTP):
+    """PipelinedSMTP that skips the EHLO round-trip entirely.
+
+    MailHog always advertises the same extension set, so instead of
+    paying a network round-trip (plus a possible HELO retry) to discover
+    it on every connection, assume it statically. Only used for the
+    local MailHog endpoint when MAILHOG_FASTPATH is set.
+    """
+
+    def ehlo(self, name=""):
+        self.esmtp_features = {
+            "pipelining": "",
+            "8bitmime": "",
+            "size": "35882577",
+        }
+        self.does_esmtp = True
+        # Satisfies ehlo_or_helo_if_needed without touching the wire
+        self.ehlo_resp = b"250 mailhog fastpath (assumed, no EHLO sent)"
+        return 250, self.ehlo_resp
+
+
+def open_session(host=SMTP_SERVER, port=SMTP_PORT):
+    """Open a fresh SMTP session and greet the server once.
+
+    PipelinedSMTP batches MAIL FROM / RCPT TO / DATA into one write when
+    the server advertises PIPELINING, and falls back to the stock
+    lock-step sendmail otherwise (MailHog advertises it). For the known
+    local MailHog the EHLO exchange itself is skipped too.
+    """
+    if MAILHOG_FASTPATH and host == "127.0.0.1":
+        server = FastMailHogSMTP(host, port, timeout=SMTP_TIMEOUT)
+    else:
+        server = PipelinedSMTP(host, port, timeout=SMTP_TIMEOUT)
+    server.ehlo()
+    return server
+
+class SMTPPool:
+    """Small pool of live SMTP sessions for repeated/batch sends.
+
+    Sessions are opened lazily up to `size`, health-checked with NOOP on
+    acquire, and recycled after `max_sends` messages, so a batch pays one
+    connection setup per ~max_sends messages instead of one per message.
+    """
+
+    def __init__(self, host=SMTP_SERVER, port=SMTP_PORT, size=POOL_SIZE,
+                 max_sends=MAX_SENDS_PER_CONNECTION):
+        self.host = host
+        self.port = port
+        self.max_sends = max_sends
+        # Idle [server, sends] entries; the semaphore caps live sessions
+        self._idle = queue.Queue(maxsize=size)
+        self._slots = threading.Semaphore(size)
+
+    @staticmethod
+    def _quit(server):
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+
+    @contextmanager
+    def acquire(self):
+        """Yield a healthy session, returning it to the pool afterwards."""
+        self._slots.acquire()
+        try:
+            try:
+                entry = self._idle.get_nowait()
+            except queue.Empty:
+                entry = None
+
+            if entry is not None:
+                server, sends = entry
+                if sends >= self.max_sends:
+                    self._quit(server)
+                    entry = None
+                else:
+                    try:
+                        server.noop()
+                    except smtplib.SMTPException:
+                        self._quit(server)
+                        entry = None
+
+            if entry is None:
+                entry = [open_session(self.host, self.port), 0]
+
+            try:
+                yield entry[0]
+            except Exception:
+                # Don't return a session in an unknown state to the pool
+                self._quit(entry[0])
+                raise
+            entry[1] += 1
+            self._idle.put(entry)
+        finally:
+            self._slots.release()
+
+    def batch(self, messages, workers=POOL_SIZE):
+        """Send (sender, recipient, payload) tuples via a thread pool.
+
+        Returns one result per message, in order: True on success, the
+        raised exception on failure.
+        """
+        def send_item(item):
+            sender, recipient, payload = item
+            with self.acquire() as server:
+                server.sendmail(sender, recipient, payload)
+            return True
+
+        results = []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(send_item, m) for m in messages]
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    results.append(e)
+        return results
+
+    def close(self):
+        """Quit all idle sessions."""
+        while True:
+            try:
+                entry = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._quit(entry[0])
+
+_POOL = SMTPPool()
+atexit.register(_POOL.close)
+
+def send_one(server, sender, recipient, payload):
+    """Send one pre-serialized message over an already-open session."""
+    server.sendmail(sender, recipient, payload)
+
+def send_external_email():
+    """
+    This simulates sending an email from an external service (like Gmail)
+    by sending it directly to MailHog, which will capture it for testing.
+    """
+    try:
+        print(f"🌐 Simulating external email via MailHog {SMTP_SERVER}:{SMTP_PORT}")
+
+        # Sessions come from the shared pool instead of reconnecting per message
+        start = time.perf_counter()
+        try:
+            with _POOL.acquire() as server:
+                connected = time.perf_counter()
+                print("✅ Connected to MailHog successfully!")
+                send_one(server, SENDER_EMAIL, RECIPIENT_EMAIL, _message_bytes())
+        except smtplib.SMTPServerDisconnected:
+            # Session died mid-send; the pool dropped it, retry on a fresh one
+            with _POOL.acquire() as server:
+                connected = time.perf_counter()
+                send_one(server, SENDER_EMAIL, RECIPIENT_EMAIL, _message_bytes())
+        done = time.perf_counter()
+
+        # Timings go to stderr so the test runner can alert on regressions
+        print(
+            f"⏱️ connect {connected - start:.3f}s, send {done - connected:.3f}s",
+            file=sys.stderr,
+        )
+        print(f"📧 External email simulation sent to {RECIPIENT_EMAIL}")
+        print("🔍 Check MailHog UI at http://localhost:8025 to see the captured email!")
+
+    except socket.timeout:
+        print(f"❌ Timed out after {SMTP_TIMEOUT}s talking to MailHog")
+    except ConnectionRefusedError:
+        print(
+            f"❌ Connection refused — is MailHog listening on {SMTP_SERVER}:{SMTP_PORT}?"
+        )
+    except smtplib.SMTPResponseException as e:
+        print(f"❌ SMTP error {e.smtp_code}: {e.smtp_error}")
+
+async def send_one_async(smtp, sender, recipient, payload):
+    """Send one pre-serialized message over an open aiosmtplib session."""
+    await smtp.sendmail(sender, recipient, payload)
+
+async def send_many(messages, host=SMTP_SERVER, port=SMTP_PORT):
+    """Send (sender, recipient, payload) tuples concurrently over one session.
+
+    The script is purely I/O bound, so launching the sends with
+    asyncio.gather lets them overlap instead of waiting out each
+    round-trip in sequence. Returns one result per message; failures come
+    back as the raised exception.
+    """
+    smtp = aiosmtplib.SMTP(hostname=host, port=port)
+    await smtp.connect()
+    try:
+        return await asyncio.gather(
+            *(send_one_async(smtp, s, r, p) for s, r, p in messages),
+            return_exceptions=True,
+        )
+    finally:
+        try:
+            await smtp.quit()
+        except aiosmtplib.SMTPException:
+            pass
+
+async def send_external_email_async():
+    """Async variant of send_external_email built on send_many."""
     try:
-        print(f"🌐 Simulating external email via MailHog {smtp_server}:{smtp_port}")
-        
-        # Create SMTP session
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            print("✅ Connected to MailHog successfully!")
-            
-            # Send email
-            text = message.as_string()
-            server.sendmail(sender_email, recipient_email, text)
-            print(f"📧 External email simulation sent to {recipient_email}")
-            print("🔍 Check MailHog UI at http://localhost:8025 to see the captured email!")
-            
+        print(f"🌐 Simulating external email via MailHog {SMTP_SERVER}:{SMTP_PORT}")
+
+        results = await send_many([(SENDER_EMAIL, RECIPIENT_EMAIL, _message_bytes())])
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+
+        print(f"📧 External email simulation sent to {RECIPIENT_EMAIL}")
+        print("🔍 Check MailHog UI at http://localhost:8025 to see the captured email!")
+
     except socket.error as e:
         print(f"❌ Connection error: {e}")
-    except smtplib.SMTPException as e:
+    except aiosmtplib.SMTPException as e:
         print(f"❌ SMTP error: {e}")
     except Exception as e:
         print(f"❌ Error: {e}")
 
+async def main():
+    await send_external_email_async()
+
 if __name__ == "__main__":
-    send_external_email()
+    asyncio.run(main())